@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the redaction path.
+
+Synthetic log lines are modeled on the user_data.csv columns with
+varying field counts, line lengths and PII densities. Each redaction path
+reports throughput, p50/p99 per-line latency and bytes allocated per
+line. A second set compares JSON records redacted by key with
+JsonRedactingFormatter against a regex over the serialized string.
+Results can be stored as a baseline and compared later:
+
+    ./benchmark.py --save baseline.json
+    ./benchmark.py --compare baseline.json
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import string
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from filtered_logger import (PII_FIELDS, JsonRedactingFormatter,
+                             RedactingFormatter, filter_datum)
+
+
+COLUMNS = ["name", "email", "phone", "ssn", "password", "ip", "last_login",
+           "user_agent"]
+FIELD_COUNTS = (3, 8)
+LINE_LENGTHS = {"short": 0, "long": 400}
+PII_DENSITIES = (0.0, 0.5, 1.0)
+LINES = 5000
+ALLOC_LINES = 500
+
+
+def _value(column: str, rng: random.Random) -> str:
+    """Return a plausible value for a user_data.csv column"""
+    digits = string.digits
+    if column == "name":
+        return "{} {}".format(rng.choice(["Marlene", "Ruth", "Kallie"]),
+                              rng.choice(["Wood", "Trevino", "Lewis"]))
+    if column == "email":
+        return "{}@{}".format("".join(rng.choices(string.ascii_lowercase,
+                                                  k=8)),
+                              rng.choice(["att.net", "me.com", "mac.com"]))
+    if column == "phone":
+        return "({}) {}-{}".format(*("".join(rng.choices(digits, k=k))
+                                     for k in (3, 3, 4)))
+    if column == "ssn":
+        return "{}-{}-{}".format(*("".join(rng.choices(digits, k=k))
+                                   for k in (3, 2, 4)))
+    if column == "password":
+        return "".join(rng.choices(string.printable[:94].replace(";", ""),
+                                   k=8))
+    if column == "ip":
+        return ":".join("{:x}".format(rng.getrandbits(16)) for _ in range(8))
+    if column == "last_login":
+        return "2019-11-14 06:{:02d}:{:02d}".format(rng.randrange(60),
+                                                    rng.randrange(60))
+    return "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36"
+
+
+def make_lines(fields: int, padding: int, density: float,
+               seed: int = 0) -> List[str]:
+    """Generate LINES messages, a `density` share of them carrying the
+       first `fields` user_data.csv columns, the others request logs"""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(LINES):
+        if rng.random() < density:
+            pairs = ["{}={}".format(col, _value(col, rng))
+                     for col in COLUMNS[:fields]]
+        else:
+            pairs = ["method=GET", "path=/api/v1/status", "status=200",
+                     "duration_ms={}".format(rng.randrange(100))]
+        if padding:
+            pairs.append("extra=" + "x" * padding)
+        lines.append(";".join(pairs) + ";")
+    return lines
+
+
+def make_records(seed: int = 0) -> List[logging.LogRecord]:
+    """Generate LINES JSON-style records: a user dict as message and
+       request context passed through `extra`"""
+    rng = random.Random(seed)
+    records = []
+    for _ in range(LINES):
+        user = {col: _value(col, rng) for col in COLUMNS}
+        record = logging.makeLogRecord({
+            "name": "user_data", "levelno": logging.INFO,
+            "levelname": "INFO", "msg": {"event": "login", "user": user},
+            "request": {"path": "/api/v1/users/me", "status": 200,
+                        "headers": {"user-agent": user["user_agent"]}},
+        })
+        records.append(record)
+    return records
+
+
+def measure(func: Callable[[str], str], lines: List[str]) -> Dict:
+    """Run func over lines and return throughput, latency and allocs"""
+    timer = time.perf_counter_ns
+    latencies = []
+    start = timer()
+    for line in lines:
+        before = timer()
+        func(line)
+        latencies.append(timer() - before)
+    total = timer() - start
+    latencies.sort()
+
+    tracemalloc.start()
+    allocated = 0
+    for line in lines[:ALLOC_LINES]:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        func(line)
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "lines_per_sec": round(len(lines) / (total / 1e9)),
+        "p50_us": round(latencies[len(latencies) // 2] / 1e3, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1e3, 2),
+        "alloc_bytes_per_line": round(allocated / min(len(lines),
+                                                      ALLOC_LINES)),
+    }
+
+
+def redaction_paths() -> Dict[str, Callable[[str], str]]:
+    """Return the redaction paths under test, keyed by name"""
+    fields = list(PII_FIELDS)
+    regex = RedactingFormatter(fields)
+    tokens = RedactingFormatter(fields, tokenize=True)
+
+    def record(line: str) -> logging.LogRecord:
+        """Wrap line in a LogRecord"""
+        return logging.LogRecord("user_data", logging.INFO, None, None,
+                                 line, None, None)
+
+    return {
+        "filter_datum": lambda line: filter_datum(fields, "***", line, ";"),
+        "formatter": lambda line: regex.format(record(line)),
+        "formatter_tokenize": lambda line: tokens.format(record(line)),
+    }
+
+
+def run() -> Dict[str, Dict]:
+    """Run every path over every synthetic workload"""
+    results = {}
+    paths = redaction_paths()
+    for fields in FIELD_COUNTS:
+        for length, padding in LINE_LENGTHS.items():
+            for density in PII_DENSITIES:
+                lines = make_lines(fields, padding, density)
+                for name, func in paths.items():
+                    key = "{} fields={} {} pii={}".format(name, fields,
+                                                          length, density)
+                    results[key] = measure(func, lines)
+    return results
+
+
+def run_json() -> Dict[str, Dict]:
+    """Compare key-based and regex-based redaction of JSON records"""
+    structured = JsonRedactingFormatter(list(PII_FIELDS))
+    plain = logging.Formatter()
+    pattern = re.compile(r'("(?:{})"\s*:\s*)"(?:[^"\\]|\\.)*"'.format(
+        "|".join(PII_FIELDS)))
+
+    def regex(record: logging.LogRecord) -> str:
+        """Serialize record then redact the JSON string with a regex"""
+        payload = {"name": record.name, "level": record.levelname,
+                   "time": plain.formatTime(record), "message": record.msg,
+                   "request": record.request}
+        return pattern.sub(r'\1"***"', json.dumps(payload))
+
+    records = make_records()
+    return {
+        "json regex": measure(regex, records),
+        "json structured": measure(structured.format, records),
+    }
+
+
+def report(results: Dict[str, Dict], baseline: Dict[str, Dict]) -> None:
+    """Print results, with the throughput ratio to baseline if any"""
+    print("{:<46} {:>10} {:>8} {:>8} {:>8} {:>7}".format(
+        "case", "lines/s", "p50 us", "p99 us", "B/line", "vs base"))
+    for key, res in results.items():
+        ratio = ""
+        if key in baseline:
+            ratio = "{:.2f}x".format(res["lines_per_sec"] /
+                                     baseline[key]["lines_per_sec"])
+        print("{:<46} {:>10} {:>8} {:>8} {:>8} {:>7}".format(
+            key, res["lines_per_sec"], res["p50_us"], res["p99_us"],
+            res["alloc_bytes_per_line"], ratio))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Redaction benchmarks")
+    parser.add_argument("--save", metavar="FILE",
+                        help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="compare against a stored baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run()
+    results.update(run_json())
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Streaming exporter: turn user_data.csv style files into redacted
+`key=value;` log lines using a pool of worker processes.
+
+Usage: ./export_user_data.py user_data.csv [-o out.log] [-w 4] [-c 5000]
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List
+from filtered_logger import PII_FIELDS, RedactingFormatter
+
+
+def redact_rows(header: List[str], rows: List[List[str]]) -> str:
+    """Format rows into `key=value;` lines with the PII columns replaced
+    by REDACTION, so separators or newlines inside values can't leak"""
+    pii = [key in PII_FIELDS for key in header]
+    redaction = RedactingFormatter.REDACTION
+    lines = []
+    for row in rows:
+        pairs = ("{}={};".format(key, redaction if is_pii else value)
+                 for key, value, is_pii in zip(header, row, pii))
+        lines.append(" ".join(pairs) + "\n")
+    return "".join(lines)
+
+
+def read_chunks(reader: Iterator[List[str]],
+                size: int) -> Iterator[List[List[str]]]:
+    """Yield lists of at most size rows from reader"""
+    while True:
+        chunk = list(islice(reader, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export(src, dst, workers: int = None, chunk_size: int = 5000) -> int:
+    """Stream the CSV file src to dst, redacted, and return the row count
+
+    At most two chunks per worker are in flight, so memory does not grow
+    with the size of the input file; output keeps the input order.
+    """
+    reader = csv.reader(src)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    workers = workers or os.cpu_count() or 1
+    rows = 0
+    with ProcessPoolExecutor(workers) as pool:
+        max_pending = 2 * workers
+        pending = []
+        for chunk in read_chunks(reader, chunk_size):
+            pending.append(pool.submit(redact_rows, header, chunk))
+            rows += len(chunk)
+            if len(pending) >= max_pending:
+                dst.write(pending.pop(0).result())
+        for future in pending:
+            dst.write(future.result())
+    return rows
+
+
+def main() -> None:
+    """Parse the command line and run the export"""
+    parser = argparse.ArgumentParser(
+        description="Redact a user_data.csv style file into log lines")
+    parser.add_argument("csv_file")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, '-' for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-c", "--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with open(args.csv_file, newline="") as src:
+        if args.output == "-":
+            rows = export(src, sys.stdout, args.workers, args.chunk_size)
+        else:
+            with open(args.output, "w") as dst:
+                rows = export(src, dst, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print("{} rows in {:.2f}s ({:.0f} rows/sec)".format(
+        rows, elapsed, rows / elapsed if elapsed else 0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
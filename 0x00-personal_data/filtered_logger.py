@@ -4,8 +4,90 @@ Regex-ing: This module contains functions to securely handle and
            obfuscate sensitive data within log messages.
 """
 import re
+import json
+import mmap
+import queue
+import atexit
 import logging
-from typing import List
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache
+from typing import Any, AnyStr, Iterable, Iterator, List, Tuple, Union
+
+
+CHUNK_SIZE = 1 << 20
+PII_FIELDS = ("name", "email", "phone", "ssn", "password")
+RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({})))
+RECORD_ATTRS |= {"message", "asctime"}
+
+
+class Redactor:
+    """ Redaction engine: compiles the obfuscation pattern for a
+        (fields, redaction, separator) combination once and reuses it
+    """
+
+    def __init__(self, fields: Tuple[str, ...], redaction: str,
+                 separator: str):
+        self.fields = tuple(fields)
+        self.redaction = redaction
+        self.separator = separator
+        alternation = '|'.join(re.escape(field) for field in self.fields)
+        self.pattern = re.compile(
+            rf"(?P<field>{alternation})=[^{re.escape(separator)}]+")
+        self._template = r"\g<field>=" + redaction.replace('\\', r'\\')
+        self._keys = frozenset(self.fields)
+        self._prefixes = tuple(field + '=' for field in self.fields)
+        line = rf"(?P<field>{alternation})=[^{re.escape(separator)}\r\n]+"
+        self._chunk_subs = {
+            str: (re.compile(line), self._template),
+            bytes: (re.compile(line.encode()), self._template.encode()),
+        }
+
+    def matches(self, message: str) -> bool:
+        """Cheap substring pre-check: can message hold a field to redact"""
+        for prefix in self._prefixes:
+            if prefix in message:
+                return True
+        return False
+
+    def redact(self, message: str) -> str:
+        """Obfuscate the value of every configured field in message"""
+        if not self.fields:
+            return message
+        return self.pattern.sub(self._template, message)
+
+    def redact_pairs(self, message: str) -> str:
+        """Obfuscate a `key=value<separator>` message without regex
+
+        The message is split once on the separator and each key is looked
+        up in a frozenset, so only whole keys are redacted. Free-form
+        messages (a non-empty chunk without '=') go through redact().
+        """
+        parts = message.split(self.separator)
+        for i, part in enumerate(parts):
+            key, eq, value = part.partition('=')
+            if not eq:
+                if part.strip():
+                    return self.redact(message)
+                continue
+            if value and key.rpartition(' ')[2] in self._keys:
+                parts[i] = key + '=' + self.redaction
+        return self.separator.join(parts)
+
+    def redact_chunk(self, chunk: AnyStr) -> AnyStr:
+        """Obfuscate a block of newline-terminated lines (str or bytes)
+           in one pass; a value never runs past the end of its line"""
+        if not self.fields:
+            return chunk
+        pattern, template = self._chunk_subs[str if isinstance(chunk, str)
+                                             else bytes]
+        return pattern.sub(template, chunk)
+
+
+@lru_cache(maxsize=64)
+def get_redactor(fields: Tuple[str, ...], redaction: str,
+                 separator: str) -> Redactor:
+    """Return the cached Redactor for the given configuration"""
+    return Redactor(fields, redaction, separator)
 
 
 class RedactingFormatter(logging.Formatter):
@@ -16,20 +98,201 @@ class RedactingFormatter(logging.Formatter):
     FORMAT = "[HOLBERTON] %(name)s %(levelname)s %(asctime)-15s: %(message)s"
     SEPARATOR = ";"
 
-    def __init__(self, fields: List[str]):
+    def __init__(self, fields: List[str], tokenize: bool = False):
         super(RedactingFormatter, self).__init__(self.FORMAT)
         self.fields = fields
+        self.tokenize = tokenize
+        self.bypassed = 0
+        self.redacted = 0
+        self._redactor = get_redactor(tuple(fields), self.REDACTION,
+                                      self.SEPARATOR)
 
     def format(self, record: logging.LogRecord) -> str:
-        """Filter values in incoming log records using filter_datum"""
+        """Filter values in incoming log records using filter_datum,
+           or the regex-free tokenizer when `tokenize` is set.
+           Records without any `field=` substring are returned as is and
+           counted in `bypassed`, the others in `redacted`"""
         msg = super(RedactingFormatter, self).format(record)
-        r_log = filter_datum(self.fields, self.REDACTION, msg, self.SEPARATOR)
-        return r_log
+        if not self._redactor.matches(msg):
+            self.bypassed += 1
+            return msg
+        self.redacted += 1
+        if self.tokenize:
+            return self._redactor.redact_pairs(msg)
+        return self._redactor.redact(msg)
+
+
+class JsonRedactingFormatter(RedactingFormatter):
+    """ Redacting Formatter emitting one JSON object per record
+
+    PII is removed by key from a dict message, dict args and `extra`
+    values (nested dicts and lists included) before serialization, so no
+    regex ever runs over the output. A string message is formatted, then
+    its `field=value` pairs are redacted like RedactingFormatter does.
+    """
+
+    def __init__(self, fields: List[str]):
+        super(JsonRedactingFormatter, self).__init__(fields)
+        self._keys = frozenset(fields)
+
+    def redact_value(self, value: Any) -> Any:
+        """Return a copy of value with the PII keys of every dict redacted"""
+        if isinstance(value, dict):
+            return {key: self.REDACTION if key in self._keys
+                    else self.redact_value(item)
+                    for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.redact_value(item) for item in value]
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize record to JSON with its PII values redacted"""
+        payload = {"name": record.name, "level": record.levelname,
+                   "time": self.formatTime(record, self.datefmt)}
+        if isinstance(record.msg, dict):
+            payload["message"] = self.redact_value(record.msg)
+        else:
+            if isinstance(record.args, dict):
+                message = str(record.msg) % self.redact_value(record.args)
+            else:
+                message = record.getMessage()
+            payload["message"] = self._redactor.redact(message)
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRS:
+                payload[key] = self.REDACTION if key in self._keys \
+                    else self.redact_value(value)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class PIIQueueHandler(QueueHandler):
+    """ Queue handler enqueuing records for a background QueueListener
+
+    With block=False a full queue drops the record and counts it in
+    `dropped`; with block=True the caller waits up to `timeout` seconds.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False,
+                 timeout: float = None):
+        super(PIIQueueHandler, self).__init__(log_queue)
+        self.block = block
+        self.timeout = timeout
+        self.dropped = 0
+        self.listener = None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put record on the queue following the drop/block policy"""
+        if self.block:
+            self.queue.put(record, timeout=self.timeout)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Stop the listener, flushing every record still queued"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super(PIIQueueHandler, self).close()
+
+
+class _PIIQueueListener(QueueListener):
+    """ QueueListener whose stop sentinel waits for room in the queue """
+
+    def enqueue_sentinel(self) -> None:
+        """Block until the sentinel fits, the worker is draining"""
+        self.queue.put(self._sentinel)
+
+
+def get_queue_logger(name: str = "user_data",
+                     fields: Tuple[str, ...] = PII_FIELDS,
+                     maxsize: int = 10000, block: bool = False,
+                     handler: logging.Handler = None) -> logging.Logger:
+    """Return a logger that only enqueues records in the calling thread
+
+    Redaction with RedactingFormatter and output through handler (a
+    StreamHandler by default) run on a QueueListener thread. The queue
+    holds at most maxsize records, see PIIQueueHandler for the drop/block
+    policy. Queued records are flushed at interpreter exit or when
+    stop_queue_logger is called.
+    """
+    logger = logging.getLogger(name)
+    for existing in logger.handlers:
+        if isinstance(existing, PIIQueueHandler):
+            return logger
+
+    if handler is None:
+        handler = logging.StreamHandler()
+    handler.setFormatter(RedactingFormatter(list(fields)))
+
+    log_queue = queue.Queue(maxsize)
+    queue_handler = PIIQueueHandler(log_queue, block)
+    queue_handler.listener = _PIIQueueListener(log_queue, handler,
+                                               respect_handler_level=True)
+    queue_handler.listener.start()
+    atexit.register(queue_handler.close)
+
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    return logger
+
+
+def stop_queue_logger(logger: logging.Logger) -> None:
+    """Flush and detach the queue pipeline set up by get_queue_logger"""
+    for handler in list(logger.handlers):
+        if isinstance(handler, PIIQueueHandler):
+            logger.removeHandler(handler)
+            handler.close()
 
 
 def filter_datum(fields: List[str], redaction: str,
                  message: str, separator: str) -> str:
     """Filters a log line"""
-    pattern = '|'.join([rf"{field}=([^{separator}]+)" for field in fields])
-    return re.sub(pattern,
-                  lambda m: f"{m.group().split('=')[0]}={redaction}", message)
+    return get_redactor(tuple(fields), redaction, separator).redact(message)
+
+
+def _iter_lines(buffer: AnyStr) -> Iterator[AnyStr]:
+    """Yield the lines of buffer, line endings included"""
+    newline = '\n' if isinstance(buffer, str) else b'\n'
+    start, end = 0, len(buffer)
+    while start < end:
+        stop = buffer.find(newline, start) + 1 or end
+        yield buffer[start:stop]
+        start = stop
+
+
+def _iter_chunks(buffer, size: int = CHUNK_SIZE) -> Iterator[AnyStr]:
+    """Yield slices of about size characters/bytes of buffer, each cut
+       right after a newline so no line is split across two chunks"""
+    newline = '\n' if isinstance(buffer, str) else b'\n'
+    start, end = 0, len(buffer)
+    while start < end:
+        stop = end
+        if start + size < end:
+            stop = buffer.find(newline, start + size) + 1 or end
+        yield buffer[start:stop]
+        start = stop
+
+
+def filter_data(lines: Union[Iterable[AnyStr], AnyStr, mmap.mmap],
+                fields: List[str], redaction: str,
+                separator: str) -> Iterator[AnyStr]:
+    """Lazily redact many log lines with a single compiled pattern
+
+    lines is either an iterable of lines (a list, an open file...) or a
+    whole text buffer: str, bytes or a memory-mapped file. Buffers are
+    redacted CHUNK_SIZE at a time, so a multi-GB archive mapped with
+    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) is processed with
+    constant memory. Redacted lines are yielded one by one.
+    """
+    redact = get_redactor(tuple(fields), redaction, separator).redact_chunk
+    if isinstance(lines, (str, bytes, bytearray, mmap.mmap)):
+        for chunk in _iter_chunks(lines, CHUNK_SIZE):
+            yield from _iter_lines(redact(chunk))
+    else:
+        for line in lines:
+            yield redact(line)
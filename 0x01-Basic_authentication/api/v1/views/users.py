@@ -2,18 +2,68 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
+from models.engine import codec
 from models.user import User
+from urllib.parse import urlencode
+
+STREAM_PAGE_SIZE = 1000
+
+
+def stream_users(after: str = None, limit: int = None):
+    """ Yield one User JSON per line, reading STREAM_PAGE_SIZE users at
+        a time
+    """
+    while limit is None or limit > 0:
+        size = STREAM_PAGE_SIZE if limit is None else \
+            min(limit, STREAM_PAGE_SIZE)
+        users = User.page(after, size)
+        for user in users:
+            yield codec.dumps(user.to_json()) + b"\n"
+        if len(users) < size:
+            return
+        after = users[-1].id
+        if limit is not None:
+            limit -= len(users)
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters (optional):
+      - limit: maximum number of users, ordered by ID
+      - after: ID of the last user of the previous page
+      - format: "ndjson" (or Accept: application/x-ndjson) to stream
+        one User JSON per line
     Return:
-      - list of all User objects JSON represented
+      - list of all User objects JSON represented, or the page of them;
+        when the page is full, a Link header points to the next one
+      - 400 if limit isn't a positive integer
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    after = request.args.get('after')
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            return jsonify({'error': "Wrong limit"}), 400
+
+    if request.args.get('format') == "ndjson" or \
+       request.accept_mimetypes.best == "application/x-ndjson":
+        return Response(stream_users(after, limit),
+                        mimetype="application/x-ndjson")
+
+    if after is None and limit is None:
+        return jsonify([user.to_json() for user in User.all()])
+    users = User.page(after, limit)
+    response = jsonify([user.to_json() for user in users])
+    if limit is not None and len(users) == limit:
+        response.headers['Link'] = '<{}?{}>; rel="next"'.format(
+            request.base_url, urlencode({'limit': limit,
+                                         'after': users[-1].id}))
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
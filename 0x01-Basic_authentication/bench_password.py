@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+""" Benchmark: p50 and p99 latency of a login (one password check) for
+    each hashing scheme at several cost parameters, to pick the ones
+    fitting the latency budget
+Usage: ./bench_password.py [rounds]
+"""
+import sys
+import time
+from models.hashers import PBKDF2Hasher, ScryptHasher, SHA256Hasher
+
+CANDIDATES = [
+    SHA256Hasher(),
+    PBKDF2Hasher(i=100000),
+    PBKDF2Hasher(i=310000),
+    PBKDF2Hasher(i=600000),
+    ScryptHasher(ln=13, r=8, p=1),
+    ScryptHasher(ln=14, r=8, p=1),
+    ScryptHasher(ln=15, r=8, p=1),
+]
+
+
+def percentile(samples: list, q: float) -> float:
+    """ q-th percentile of sorted samples
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for hasher in CANDIDATES:
+        encoded = hasher.hash("H0lbertonSchool98!")
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher.verify("H0lbertonSchool98!", encoded)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        params = ",".join("{}={}".format(k, v)
+                          for k, v in hasher.params.items())
+        print("{:<14} {:<14} p50 {:8.2f} ms  p99 {:8.2f} ms".format(
+            hasher.name, params, percentile(samples, 0.5),
+            percentile(samples, 0.99)))
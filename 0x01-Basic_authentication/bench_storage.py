@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+""" Benchmark: memory per cached user, then save and load a snapshot
+    of 100k users with the fast codec (orjson, if installed) and with
+    the standard library json
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from models.engine import codec, file_storage
+from models.hashers import hash_password
+from models.user import User
+
+USERS = 100000
+
+
+def bench(label: str):
+    """ Time save_to_file and load_from_file of USERS users
+    """
+    start = time.perf_counter()
+    User.save_to_file()
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    User.load_from_file()
+    loaded = time.perf_counter() - start
+    print("{:<10} save {:6.2f}s  load {:6.2f}s".format(label, saved, loaded))
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())
+    tracemalloc.start()
+    users = {}
+    password = hash_password("pwd")
+    for i in range(USERS):
+        user = User(email="user{}@hbtn.io".format(i), first_name="Bob",
+                    _password=password)
+        users[user.id] = user
+    print("{:.0f} bytes per user".format(
+        tracemalloc.get_traced_memory()[0] / USERS))
+    tracemalloc.stop()
+    file_storage.DATA["User"] = users
+
+    if codec.orjson is not None:
+        bench("orjson")
+    codec.orjson = None
+    bench("json")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+""" Main 7
+"""
+import threading
+import uuid
+from models.user import User
+
+""" Create a user test """
+user = User()
+user.email = str(uuid.uuid4())
+user.password = str(uuid.uuid4())
+user.save()
+
+""" Save and reload it while searching it by email """
+done = threading.Event()
+
+
+def churn():
+    """ Save the user, reload the table from file, repeat """
+    while not done.is_set():
+        for _ in range(100):
+            User.get(user.id).save()
+        User.load_from_file()
+
+
+writer = threading.Thread(target=churn)
+writer.start()
+misses = 0
+for _ in range(200000):
+    if len(User.search({'email': user.email})) != 1:
+        misses += 1
+done.set()
+writer.join()
+print("Misses: {}".format(misses))
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+""" Storage backends of models.base, selected by STORAGE_BACKEND:
+    "file" (default), "sqlite" (database file at SQLITE_PATH) or "lazy"
+    (at most LAZY_CACHE_SIZE objects of a class kept in memory)
+"""
+from os import getenv
+
+
+storage = None
+storage_backend = getenv("STORAGE_BACKEND", "file")
+
+if storage_backend == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(getenv("SQLITE_PATH", ".db.sqlite3"))
+elif storage_backend == "lazy":
+    from models.engine.lazy_storage import LazyFileStorage
+    storage = LazyFileStorage(int(getenv("LAZY_CACHE_SIZE", "10000")))
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+""" JSON codec of the storage backends: orjson when it is installed,
+    the standard library json module otherwise. Both read and write the
+    same files.
+"""
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """ Serialize obj to UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def loads(data):
+    """ Deserialize a JSON document from bytes or str
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+""" Columnar copy of a table for bulk multi-attribute search
+"""
+from itertools import compress, repeat
+from operator import eq
+from typing import Any, Iterable, List, Tuple
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+MISSING = object()
+SCALARS = (str, int, float, bool, type(None))
+
+
+class ColumnTable():
+    """ One list per attribute plus the row -> id mapping
+
+    Rows are kept dense: removing a row moves the last one into its
+    place. Filters run over whole columns at C speed, with NumPy object
+    arrays (rebuilt lazily after writes) when NumPy is installed.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.rows = {}
+        self.columns = {}
+        self._arrays = {}
+
+    def __len__(self) -> int:
+        """ Number of rows
+        """
+        return len(self.ids)
+
+    def upsert(self, obj_id: str, attributes: Iterable[Tuple[str, Any]]):
+        """ Insert or replace the row of obj_id
+        """
+        row = self.rows.get(obj_id)
+        if row is None:
+            row = len(self.ids)
+            self.rows[obj_id] = row
+            self.ids.append(obj_id)
+            for column in self.columns.values():
+                column.append(MISSING)
+        seen = set()
+        for name, value in attributes:
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [MISSING] * len(self.ids)
+            column[row] = value
+            seen.add(name)
+        for name, column in self.columns.items():
+            if name not in seen:
+                column[row] = MISSING
+        self._arrays.clear()
+
+    def remove(self, obj_id: str):
+        """ Delete the row of obj_id
+        """
+        row = self.rows.pop(obj_id, None)
+        if row is None:
+            return
+        last_id = self.ids.pop()
+        for column in self.columns.values():
+            last = column.pop()
+            if row < len(column):
+                column[row] = last
+        if row < len(self.ids):
+            self.ids[row] = last_id
+            self.rows[last_id] = row
+        self._arrays.clear()
+
+    def _array(self, name: str):
+        """ Return the column as a NumPy object array
+        """
+        array = self._arrays.get(name)
+        if array is None:
+            array = numpy.empty(len(self.ids), dtype=object)
+            array[:] = self.columns[name]
+            self._arrays[name] = array
+        return array
+
+    def search(self, attributes: dict) -> List[str]:
+        """ Return the ids of the rows matching every attribute, or None
+            if an attribute is not a column
+        """
+        if any(name not in self.columns for name in attributes):
+            return None
+        if not attributes:
+            return list(self.ids)
+        if numpy is not None and \
+           all(isinstance(v, SCALARS) for v in attributes.values()):
+            mask = numpy.ones(len(self.ids), dtype=bool)
+            for name, value in attributes.items():
+                mask &= self._array(name) == value
+            return [self.ids[row] for row in numpy.flatnonzero(mask)]
+
+        rows = None
+        for name, value in attributes.items():
+            column = self.columns[name]
+            if rows is None:
+                rows = list(compress(range(len(column)),
+                                     map(eq, column, repeat(value))))
+            else:
+                rows = [row for row in rows if column[row] == value]
+        return [self.ids[row] for row in rows]
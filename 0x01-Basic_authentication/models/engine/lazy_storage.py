@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+""" Lazily loaded storage on line-delimited .db_<Class>.jsonl files
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import TypeVar, List
+from os import path
+import os
+import threading
+from models.engine import codec
+from models.engine.interface import Storage
+
+
+class LazyTable():
+    """ State of one class: the open .jsonl file, the offset of the last
+        record of every live object, the sorted list of their IDs, the
+        secondary indexes and the LRU cache of materialized objects
+    """
+
+    def __init__(self, cls: type, file_path: str):
+        self.cls = cls
+        self.file_path = file_path
+        self.file = None
+        self.size = 0
+        self.garbage = 0
+        self.offsets = {}
+        self.ordered = None
+        self.indexes = {attr: {} for attr in cls.indexes}
+        self.indexed_values = {}
+        self.cache = OrderedDict()
+        self.lock = threading.RLock()
+
+    def index_add(self, obj_id: str, obj_json: dict):
+        """ Add the indexed attributes of obj_json to the indexes
+        """
+        values = {}
+        for attr, index in self.indexes.items():
+            value = obj_json.get(attr)
+            try:
+                index.setdefault(value, {})[obj_id] = None
+            except TypeError:
+                continue
+            values[attr] = value
+        self.indexed_values[obj_id] = values
+
+    def index_remove(self, obj_id: str):
+        """ Remove obj_id from the indexes
+        """
+        for attr, value in self.indexed_values.pop(obj_id, {}).items():
+            bucket = self.indexes[attr].get(value, {})
+            bucket.pop(obj_id, None)
+            if not bucket:
+                self.indexes[attr].pop(value, None)
+
+
+class LazyFileStorage(Storage):
+    """ Startup only scans .db_<Class>.jsonl to build an id -> offset
+        index (plus the secondary indexes); objects are materialized on
+        first access and at most cache_size of them stay in memory.
+
+    The file is an append-only log of {"op": "save", "obj": ...} and
+    {"op": "remove", "id": ...} records, the last one of an id wins. It
+    is rewritten with only live records once superseded records
+    outnumber them.
+    """
+
+    def __init__(self, cache_size: int = 10000):
+        self.cache_size = cache_size
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _table(self, cls: type) -> LazyTable:
+        """ Return the table of cls, loading it on first use
+        """
+        table = self._tables.get(cls.__name__)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(cls.__name__)
+                if table is None:
+                    table = self._scan(cls)
+                    self._tables[cls.__name__] = table
+        return table
+
+    def _scan(self, cls: type) -> LazyTable:
+        """ Build the table of cls from its .jsonl file, converting a
+            .db_<Class>.json snapshot the first time
+        """
+        s_class = cls.__name__
+        table = LazyTable(cls, ".db_{}.jsonl".format(s_class))
+        snapshot_path = ".db_{}.json".format(s_class)
+        if not path.exists(table.file_path) and path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as f:
+                objs_json = codec.loads(f.read())
+            with open(table.file_path + ".tmp", 'wb') as f:
+                for obj_json in objs_json.values():
+                    f.write(codec.dumps({'op': 'save', 'obj': obj_json}))
+                    f.write(b"\n")
+            os.replace(table.file_path + ".tmp", table.file_path)
+
+        table.file = open(table.file_path, 'a+b')
+        table.file.seek(0)
+        offset = 0
+        for line in table.file:
+            try:
+                record = codec.loads(line) if line.endswith(b"\n") else None
+            except ValueError:
+                record = None
+            if record is None:
+                break
+            self._apply(table, record, offset, len(line))
+            offset += len(line)
+        table.file.truncate(offset)
+        table.file.seek(0, os.SEEK_END)
+        table.size = offset
+        table.ordered = sorted(table.offsets)
+        return table
+
+    def _apply(self, table: LazyTable, record: dict, offset: int,
+               length: int):
+        """ Apply one log record located at offset to the table
+        """
+        if record.get('op') == 'save':
+            obj_id = record['obj']['id']
+            if obj_id in table.offsets:
+                table.garbage += 1
+                table.index_remove(obj_id)
+            elif table.ordered is not None:
+                insort(table.ordered, obj_id)
+            table.offsets[obj_id] = (offset, length)
+            table.index_add(obj_id, record['obj'])
+        elif record.get('op') == 'remove':
+            if table.offsets.pop(record['id'], None) is not None:
+                table.index_remove(record['id'])
+                table.garbage += 1
+                if table.ordered is not None:
+                    del table.ordered[bisect_left(table.ordered,
+                                                  record['id'])]
+            table.garbage += 1
+
+    def _append(self, table: LazyTable, record: dict):
+        """ Append a record to the log and apply it
+        """
+        line = codec.dumps(record) + b"\n"
+        table.file.write(line)
+        table.file.flush()
+        self._apply(table, record, table.size, len(line))
+        table.size += len(line)
+        if table.garbage > max(len(table.offsets), 1000):
+            self._rewrite(table)
+
+    def _rewrite(self, table: LazyTable):
+        """ Rewrite the log with only the last record of live objects
+        """
+        with table.lock:
+            offsets = {}
+            size = 0
+            with open(table.file_path + ".tmp", 'wb') as f:
+                for obj_id, (offset, length) in table.offsets.items():
+                    f.write(os.pread(table.file.fileno(), length, offset))
+                    offsets[obj_id] = (size, length)
+                    size += length
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(table.file_path + ".tmp", table.file_path)
+            table.file.close()
+            table.file = open(table.file_path, 'a+b')
+            table.offsets = offsets
+            table.size = size
+            table.garbage = 0
+
+    def _materialize(self, table: LazyTable,
+                     obj_id: str, cache: bool = True) -> TypeVar('Base'):
+        """ Return the object obj_id, from the cache or read from disk
+        """
+        with table.lock:
+            obj = table.cache.get(obj_id)
+            if obj is not None:
+                table.cache.move_to_end(obj_id)
+                return obj
+            location = table.offsets.get(obj_id)
+            if location is None:
+                return None
+            offset, length = location
+            record = codec.loads(os.pread(table.file.fileno(), length,
+                                          offset))
+            obj = table.cls(**record['obj'])
+            if cache:
+                table.cache[obj_id] = obj
+                if len(table.cache) > self.cache_size:
+                    table.cache.popitem(last=False)
+            return obj
+
+    def load(self, cls: type):
+        """ (Re)build the offset index of cls from its file
+        """
+        with self._lock:
+            table = self._tables.pop(cls.__name__, None)
+            if table is not None:
+                table.file.close()
+        self._table(cls)
+
+    def save_all(self, cls: type):
+        """ Rewrite the log of cls with only live records
+        """
+        self._rewrite(self._table(cls))
+
+    def compact(self, cls: type):
+        """ Rewrite the log of cls with only live records
+        """
+        self._rewrite(self._table(cls))
+
+    def save(self, obj: TypeVar('Base')):
+        """ Append obj to the log and keep it in the cache
+        """
+        table = self._table(obj.__class__)
+        obj_json = obj.to_json(True)
+        with table.lock:
+            for attr, unique in obj.indexes.items():
+                value = obj_json.get(attr)
+                if not unique or value is None:
+                    continue
+                try:
+                    ids = table.indexes[attr].get(value, {})
+                except TypeError:
+                    continue
+                if any(obj_id != obj.id for obj_id in ids):
+                    raise ValueError("{} {} already exists".format(attr,
+                                                                   value))
+            self._append(table, {'op': 'save', 'obj': obj_json})
+            table.cache[obj.id] = obj
+            table.cache.move_to_end(obj.id)
+            if len(table.cache) > self.cache_size:
+                table.cache.popitem(last=False)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Append a remove record of obj to the log
+        """
+        table = self._table(obj.__class__)
+        with table.lock:
+            table.cache.pop(obj.id, None)
+            if obj.id in table.offsets:
+                self._append(table, {'op': 'remove', 'id': obj.id})
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        return len(self._table(cls).offsets)
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        return self._materialize(self._table(cls), id)
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes
+
+        An indexed attribute narrows the candidates; otherwise every
+        object is read, without evicting the cache for the scan.
+        """
+        table = self._table(cls)
+        ids = None
+        for k, v in attributes.items():
+            if k not in table.indexes:
+                continue
+            try:
+                ids = list(table.indexes[k].get(v, ()))
+            except TypeError:
+                continue
+            break
+        cache = ids is not None
+        if ids is None:
+            ids = list(table.offsets)
+
+        result = []
+        for obj_id in ids:
+            obj = self._materialize(table, obj_id, cache)
+            if obj is None:
+                continue
+            if all(getattr(obj, k) == v for k, v in attributes.items()):
+                result.append(obj)
+        return result
+
+    def page(self, cls: type, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID after the ID `after`;
+            only the objects of the page are read
+        """
+        table = self._table(cls)
+        with table.lock:
+            start = 0 if after is None else bisect_right(table.ordered,
+                                                         after)
+            end = None if limit is None else start + limit
+            ids = table.ordered[start:end]
+        objs = (self._materialize(table, obj_id, False) for obj_id in ids)
+        return [obj for obj in objs if obj is not None]
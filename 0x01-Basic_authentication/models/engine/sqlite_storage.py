@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+""" SQLite storage shared by every process using the same database file
+"""
+from typing import TypeVar, List
+from os import path
+import sqlite3
+import threading
+from models.engine import codec
+from models.engine.interface import Storage
+
+
+class SQLiteStorage(Storage):
+    """ One table per model class: the object serialized in `data` plus
+        one indexed column per attribute declared in `indexes`.
+
+    Connections are per thread, in WAL mode so readers never block the
+    writer. SQL strings are built once per class; sqlite3 keeps the
+    prepared statements in its per-connection cache.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """ Return the connection of the current thread
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _table(self, cls: type) -> dict:
+        """ Create the table of cls if needed and return its statements
+        """
+        s_class = cls.__name__
+        table = self._tables.get(s_class)
+        if table is not None:
+            return table
+        with self._lock:
+            if s_class in self._tables:
+                return self._tables[s_class]
+            conn = self._connection()
+            columns = list(cls.indexes)
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS "{}" '
+                             '(id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                             .format(s_class))
+                existing = [row[1] for row in conn.execute(
+                    'PRAGMA table_info("{}")'.format(s_class))]
+                for column, unique in cls.indexes.items():
+                    if column not in existing:
+                        conn.execute('ALTER TABLE "{}" ADD COLUMN "{}"'
+                                     .format(s_class, column))
+                    conn.execute('CREATE {}INDEX IF NOT EXISTS "ix_{}_{}" '
+                                 'ON "{}" ("{}")'.format(
+                                     "UNIQUE " if unique else "", s_class,
+                                     column, s_class, column))
+            names = ", ".join('"{}"'.format(c) for c in ["id", "data"] +
+                              columns)
+            updates = ", ".join('"{0}" = excluded."{0}"'.format(c)
+                                for c in ["data"] + columns)
+            table = {
+                'columns': columns,
+                'upsert': 'INSERT INTO "{}" ({}) VALUES ({}) ON CONFLICT(id) '
+                          'DO UPDATE SET {}'.format(
+                              s_class, names,
+                              ", ".join("?" * (len(columns) + 2)), updates),
+                'delete': 'DELETE FROM "{}" WHERE id = ?'.format(s_class),
+                'get': 'SELECT data FROM "{}" WHERE id = ?'.format(s_class),
+                'count': 'SELECT COUNT(*) FROM "{}"'.format(s_class),
+                'select': 'SELECT data FROM "{}"'.format(s_class),
+                'page': 'SELECT data FROM "{}" WHERE id > ? ORDER BY id '
+                        'LIMIT ?'.format(s_class),
+            }
+            self._tables[s_class] = table
+        return table
+
+    def load(self, cls: type):
+        """ Create the table of cls, importing .db_<Class>.json into it
+            the first time
+        """
+        table = self._table(cls)
+        file_path = ".db_{}.json".format(cls.__name__)
+        if self.count(cls) > 0 or not path.exists(file_path):
+            return
+        with open(file_path, 'rb') as f:
+            objs_json = codec.loads(f.read())
+        conn = self._connection()
+        with conn:
+            conn.executemany(table['upsert'],
+                             (self._row(cls(**obj_json), table)
+                              for obj_json in objs_json.values()))
+
+    def _row(self, obj: TypeVar('Base'), table: dict) -> tuple:
+        """ Return the values of obj for the upsert statement
+        """
+        values = [obj.id, codec.dumps(obj.to_json(True)).decode('utf-8')]
+        for column in table['columns']:
+            values.append(getattr(obj, column, None))
+        return tuple(values)
+
+    def save_all(self, cls: type):
+        """ Nothing to do: every save() is committed
+        """
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update obj
+        """
+        cls = obj.__class__
+        table = self._table(cls)
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(table['upsert'], self._row(obj, table))
+        except sqlite3.IntegrityError as e:
+            for column in table['columns']:
+                if str(e).endswith(".{}".format(column)):
+                    raise ValueError("{} {} already exists".format(
+                        column, getattr(obj, column, None)))
+            raise ValueError(str(e))
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+        table = self._table(obj.__class__)
+        conn = self._connection()
+        with conn:
+            conn.execute(table['delete'], (obj.id,))
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        table = self._table(cls)
+        return self._connection().execute(table['count']).fetchone()[0]
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        table = self._table(cls)
+        row = self._connection().execute(table['get'], (id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**codec.loads(row[0]))
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes: indexed
+            attributes are filtered in SQL, the others on the objects
+        """
+        table = self._table(cls)
+        sql = table['select']
+        clauses = []
+        params = []
+        for k, v in attributes.items():
+            if k not in table['columns'] or \
+               not isinstance(v, (str, int, float, type(None))):
+                continue
+            if v is None:
+                clauses.append('"{}" IS NULL'.format(k))
+            else:
+                clauses.append('"{}" = ?'.format(k))
+                params.append(v)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        rows = self._connection().execute(sql + " ORDER BY rowid", params)
+
+        result = []
+        for row in rows:
+            obj = cls(**codec.loads(row[0]))
+            if all(getattr(obj, k) == v for k, v in attributes.items()):
+                result.append(obj)
+        return result
+
+    def page(self, cls: type, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID after the ID `after`,
+            walking the primary key index
+        """
+        table = self._table(cls)
+        rows = self._connection().execute(
+            table['page'], (after or "", -1 if limit is None else limit))
+        return [cls(**codec.loads(row[0])) for row in rows]
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """ User module
 """
-import hashlib
+from models import hashers
 from models.base import Base
 
 
@@ -9,6 +9,9 @@ class User(Base):
     """ User class
     """
 
+    __slots__ = ('email', '_password', 'first_name', 'last_name')
+    indexes = {'email': True}
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
         """
@@ -26,22 +29,43 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """ Setter of a new password: encrypt in SHA256
+        """ Setter of a new password: hash it with PASSWORD_SCHEME
         """
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = hashers.hash_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
-        """ Validate a password
+        """ Validate a password, rehashing it if its hash doesn't use
+            the current scheme and cost parameters
         """
         if pwd is None or type(pwd) is not str:
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        if not hashers.verify_password(pwd, self.password):
+            return False
+        if hashers.needs_rehash(self.password):
+            self._rehash(pwd)
+        return True
+
+    def _rehash(self, pwd: str):
+        """ Save a new hash of the valid password pwd, only if the stored
+            user still has the hash it was checked against; on failure
+            the old hash, still valid, is kept
+        """
+        stored = self.get(self.id)
+        if stored is None or stored.password != self.password:
+            return
+        hashed = stored.password
+        stored.password = pwd
+        try:
+            stored.save()
+        except Exception:
+            stored._password = hashed
+            return
+        self._password = stored.password
 
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
@@ -2,8 +2,39 @@
 
 """Auth class"""
 
+import re
 from flask import request
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import List, Tuple, TypeVar
+
+PATH_CACHE_SIZE = 4096
+
+
+class PathMatcher:
+    """class matching request paths against a list of excluded paths
+
+    The excluded paths are compiled once into a single regex of prefixes,
+    `*` matching any characters, and the answer for each path is cached.
+    """
+    def __init__(self, excluded_paths: Tuple[str, ...]):
+        """Compile the excluded paths"""
+        self.pattern = re.compile("|".join(
+            re.escape(ex_path).replace(r"\*", ".*")
+            for ex_path in excluded_paths))
+        self.require_auth = lru_cache(maxsize=PATH_CACHE_SIZE)(
+            self._require_auth)
+
+    def _require_auth(self, path: str) -> bool:
+        """Method that returns False if the path is excluded"""
+        if path[-1] != '/':
+            path += '/'
+        return self.pattern.match(path) is None
+
+
+@lru_cache(maxsize=32)
+def path_matcher(excluded_paths: Tuple[str, ...]) -> PathMatcher:
+    """Return the PathMatcher of a tuple of excluded paths"""
+    return PathMatcher(excluded_paths)
 
 
 class Auth:
@@ -12,16 +43,7 @@ class Auth:
         """public method"""
         if not path or not excluded_paths or len(excluded_paths) == 0:
             return True
-
-        if path[-1] != '/':
-            path += '/'
-
-        for ex_path in excluded_paths:
-            if ex_path[-1] == "*":
-                ex_path = ex_path[:-1]
-            if path.startswith(ex_path):
-                return False
-        return True
+        return path_matcher(tuple(excluded_paths)).require_auth(path)
 
     def authorization_header(self, request=None) -> str:
         """public method"""
@@ -2,22 +2,102 @@
 
 """Auth class"""
 
-import base64
-from typing import TypeVar
+import binascii
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Tuple, TypeVar, Union
 from api.v1.auth.auth import Auth
 from models.user import User
 
+CACHE_SIZE = int(getenv("BASIC_AUTH_CACHE_SIZE", "10000"))
+CACHE_TTL = float(getenv("BASIC_AUTH_CACHE_TTL", "60"))
+MAX_HEADER_SIZE = 4096
+BASE64_ALPHABET = (b"ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                   b"abcdefghijklmnopqrstuvwxyz0123456789+/=")
+try:
+    binascii.a2b_base64(b"", strict_mode=True)
+    STRICT_BASE64 = True
+except TypeError:
+    STRICT_BASE64 = False
+
+
+def decode_payload(payload: Union[str, bytes]) -> bytes:
+    """Return the decoded Base64 payload, or None if it is oversized or
+    not Base64"""
+    if len(payload) > MAX_HEADER_SIZE:
+        return None
+    try:
+        if STRICT_BASE64:
+            return binascii.a2b_base64(payload, strict_mode=True)
+        if isinstance(payload, str):
+            payload = payload.encode('ascii')
+        if payload.translate(None, BASE64_ALPHABET):
+            return None
+        return binascii.a2b_base64(payload)
+    except ValueError:
+        return None
+
+
+def extract_payload(header: Union[str, bytes]) -> Union[str, bytes]:
+    """Return the Base64 part of a Basic Authorization header, or None
+    if the header isn't one"""
+    if not isinstance(header, (str, bytes)) or \
+       len(header) > MAX_HEADER_SIZE + 6 or \
+       header[:6] not in ("Basic ", b"Basic "):
+        return None
+    return header[6:]
+
+
+def split_credentials(decoded: str) -> Tuple[str, str]:
+    """Return the (email, password) of a decoded payload, or None if it
+    has no colon"""
+    email, sep, pwd = decoded.partition(":")
+    if not sep:
+        return None
+    return email, pwd
+
+
+def parse_authorization_header(
+        header: Union[str, bytes]) -> Tuple[str, str]:
+    """Return the (email, password) of a Basic Authorization header in
+    one pass, or None as soon as the header can't be valid"""
+    payload = extract_payload(header)
+    if payload is None:
+        return None
+    decoded = decode_payload(payload)
+    if not decoded:
+        return None
+    try:
+        return split_credentials(decoded.decode('utf-8'))
+    except UnicodeDecodeError:
+        return None
+
 
 class BasicAuth(Auth):
-    """class to manage the API Basic Authentication"""
+    """class to manage the API Basic Authentication
+
+    Verified Authorization headers are cached for CACHE_TTL seconds (at
+    most CACHE_SIZE of them) under their HMAC with a per-process key,
+    mapped to the user id. A hit is dropped once the user is removed or
+    their email or password changed.
+    """
+    def __init__(self):
+        """Initialize the verification cache"""
+        self._cache_key = os.urandom(32)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
     def extract_base64_authorization_header(self,
                                             authorization_header: str) -> str:
         """Method to return the Base64 part of the Authorization header"""
-        if not authorization_header or \
-           not isinstance(authorization_header, str) or \
-           not authorization_header.startswith("Basic "):
+        if not isinstance(authorization_header, str):
             return None
-        return authorization_header.split()[1]
+        return extract_payload(authorization_header)
 
     def decode_base64_authorization_header(
                                 self, base64_authorization_header: str) -> str:
@@ -25,25 +105,22 @@ class BasicAuth(Auth):
         if not base64_authorization_header or \
            not isinstance(base64_authorization_header, str):
             return None
+        decoded = decode_payload(base64_authorization_header)
         try:
-            encoded_bytes = base64_authorization_header.encode('utf-8')
-            decoded_bytes = base64.b64decode(encoded_bytes)
-            return decoded_bytes.decode('utf-8')
-        except Exception:
+            return decoded.decode('utf-8')
+        except (AttributeError, UnicodeDecodeError):
             return None
 
     def extract_user_credentials(
             self, decoded_base64_authorization_header: str) -> (str, str):
         """Method that returns the user email and
             password from the Base64 decoded value"""
-        if not decoded_base64_authorization_header or \
-           not isinstance(decoded_base64_authorization_header, str) or \
-           ":" not in decoded_base64_authorization_header:
+        if not isinstance(decoded_base64_authorization_header, str):
             return None, None
-        user_cred = tuple(decoded_base64_authorization_header.split(":", 1))
-        if not user_cred or len(user_cred) < 2:
+        credentials = split_credentials(decoded_base64_authorization_header)
+        if credentials is None:
             return None, None
-        return user_cred
+        return credentials
 
     def user_object_from_credentials(
             self, user_email: str, user_pwd: str) -> TypeVar('User'):
@@ -66,11 +143,49 @@ class BasicAuth(Auth):
             return None
         return user
 
+    def _cache_get(self, digest: bytes) -> TypeVar('User'):
+        """Method that returns the still valid cached User of a digest"""
+        with self._cache_lock:
+            entry = self._cache.get(digest)
+            if entry is None:
+                return None
+            user_id, email, password, expires = entry
+            if expires < time.monotonic():
+                del self._cache[digest]
+                return None
+            self._cache.move_to_end(digest)
+        user = User.get(user_id)
+        if user is None or user.email != email or user.password != password:
+            with self._cache_lock:
+                self._cache.pop(digest, None)
+            return None
+        return user
+
+    def _cache_set(self, digest: bytes, user: TypeVar('User')):
+        """Method that caches the User verified for a digest"""
+        with self._cache_lock:
+            self._cache[digest] = (user.id, user.email, user.password,
+                                   time.monotonic() + CACHE_TTL)
+            self._cache.move_to_end(digest)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def current_user(self, request=None) -> TypeVar('User'):
         """Method that retrieves the User instance for a request
         """
         auth_header = self.authorization_header(request)
-        base64_auth = self.extract_base64_authorization_header(auth_header)
-        decoded_auth = self.decode_base64_authorization_header(base64_auth)
-        user_email, user_pwd = self.extract_user_credentials(decoded_auth)
-        return self.user_object_from_credentials(user_email, user_pwd)
+        digest = None
+        if CACHE_SIZE > 0 and isinstance(auth_header, str):
+            digest = hmac.new(self._cache_key,
+                              auth_header.encode('utf-8', 'surrogatepass'),
+                              hashlib.sha256).digest()
+            user = self._cache_get(digest)
+            if user is not None:
+                return user
+        credentials = parse_authorization_header(auth_header)
+        if credentials is None:
+            return None
+        user = self.user_object_from_credentials(*credentials)
+        if user is not None and digest is not None:
+            self._cache_set(digest, user)
+        return user
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+""" Benchmark: parse valid and garbage Basic Authorization headers with
+    the original chain of BasicAuth methods and with the single pass
+    parse_authorization_header
+"""
+import base64
+import timeit
+from api.v1.auth.basic_auth import parse_authorization_header
+
+ROUNDS = 200000
+HEADERS = {
+    'valid': "Basic " + base64.b64encode(b"bob@hbtn.io:H0lbertonSchool98!")
+    .decode(),
+    'bad scheme': "Bearer eyJhbGciOiJIUzI1NiJ9.e30.ZRrHA1JJJW8opsbCGfG_HA",
+    'not base64': "Basic " + "!@#$" * 16,
+    'no colon': "Basic " + base64.b64encode(b"bob@hbtn.io").decode(),
+    'oversized': "Basic " + "QUFB" * 4096,
+}
+
+
+def chained(header: str) -> tuple:
+    """ The original pipeline: split, encode, b64decode, decode, split
+    """
+    if not header or not isinstance(header, str) or \
+       not header.startswith("Basic "):
+        return None, None
+    try:
+        decoded = base64.b64decode(header.split()[1].encode('utf-8'))
+        decoded = decoded.decode('utf-8')
+    except Exception:
+        return None, None
+    if ":" not in decoded:
+        return None, None
+    return tuple(decoded.split(":", 1))
+
+
+if __name__ == "__main__":
+    for label, header in HEADERS.items():
+        rounds = ROUNDS // 100 if label == 'oversized' else ROUNDS
+        times = []
+        for parse in (chained, parse_authorization_header):
+            seconds = timeit.timeit(lambda: parse(header), number=rounds)
+            times.append(seconds / rounds * 1e9)
+        print("{:<12} chained {:8.0f} ns  single pass {:8.0f} ns".format(
+            label, *times))
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+""" In-memory storage persisted to .db_<Class>.json files
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import TypeVar, List
+from os import getenv, path
+import atexit
+import os
+import shutil
+import threading
+from models.engine import codec
+from models.engine.columns import ColumnTable
+from models.engine.interface import Storage
+
+
+# DATA, INDEXES, INDEXED_VALUES and ORDERED (the sorted IDs of every
+# class) are mutated by writers holding the per-class lock from LOCKS;
+# readers go lock-free, relying on single dict and list operations (get,
+# len, list(d.values()), slicing) being atomic, and on load() building a
+# whole table and its indexes off to the side before swapping them in
+DATA = {}
+INDEXES = {}
+INDEXED_VALUES = {}
+ORDERED = {}
+LOCKS = {}
+# with COLUMNAR set, COLUMNS keeps a ColumnTable copy of every class for
+# searches that no secondary index can answer
+COLUMNAR = getenv("COLUMNAR", "") not in ("", "0")
+COLUMNS = {}
+# "snapshot" rewrites .db_<Class>.json on every mutation, "journal"
+# appends each mutation to .db_<Class>.journal and compacts in background,
+# "group" lets a background flusher rewrite the snapshot at most every
+# GROUP_COMMIT_MS milliseconds or every GROUP_COMMIT_MAX mutations
+PERSISTENCE = getenv("PERSISTENCE", "snapshot")
+JOURNAL_COMPACT_EVERY = int(getenv("JOURNAL_COMPACT_EVERY", "1000"))
+GROUP_COMMIT_MS = int(getenv("GROUP_COMMIT_MS", "50"))
+GROUP_COMMIT_MAX = int(getenv("GROUP_COMMIT_MAX", "100"))
+JOURNAL_LOCK = threading.RLock()
+SNAPSHOT_LOCK = threading.RLock()
+JOURNALS = {}
+DIRTY = {}
+FLUSH_CONDITION = threading.Condition()
+FLUSH_LOCK = threading.Lock()
+FLUSHER = None
+
+
+def _flush_loop():
+    """ Background flusher of the "group" persistence mode
+    """
+    while True:
+        with FLUSH_CONDITION:
+            FLUSH_CONDITION.wait_for(lambda: DIRTY)
+            FLUSH_CONDITION.wait_for(
+                lambda: max(DIRTY.values(), default=0) >= GROUP_COMMIT_MAX,
+                GROUP_COMMIT_MS / 1000)
+        flush()
+
+
+def mark_dirty(cls: type):
+    """ Record a pending mutation of cls for the background flusher
+    """
+    global FLUSHER
+    with FLUSH_CONDITION:
+        DIRTY[cls] = DIRTY.get(cls, 0) + 1
+        if FLUSHER is None:
+            FLUSHER = threading.Thread(target=_flush_loop, daemon=True)
+            FLUSHER.start()
+        FLUSH_CONDITION.notify()
+
+
+def flush():
+    """ Synchronously write the snapshot of every class with pending
+        mutations
+
+    FLUSH_LOCK is held from taking the pending classes until their
+    snapshots are written, so a flush() racing the background flusher
+    returns only once the in-flight write is done too.
+    """
+    with FLUSH_LOCK:
+        with FLUSH_CONDITION:
+            dirty = list(DIRTY)
+            DIRTY.clear()
+        for cls in dirty:
+            cls.save_to_file()
+
+
+atexit.register(flush)
+
+
+def _lock(cls: type) -> threading.RLock:
+    """ Return the writer lock of the class
+    """
+    lock = LOCKS.get(cls.__name__)
+    if lock is None:
+        lock = LOCKS.setdefault(cls.__name__, threading.RLock())
+    return lock
+
+
+def _index_add(obj: TypeVar('Base'), indexes: dict, indexed_values: dict):
+    """ Add obj to indexes, recording the indexed values
+    """
+    values = {}
+    for attr in obj.indexes:
+        value = getattr(obj, attr, None)
+        try:
+            indexes[attr].setdefault(value, {})[obj.id] = None
+        except TypeError:
+            continue
+        values[attr] = value
+    indexed_values[obj.id] = values
+
+
+class FileStorage(Storage):
+    """ Objects live in the module level DATA dict, persisted according
+        to PERSISTENCE
+    """
+
+    def load(self, cls: type):
+        """ Load all objects from file, then replay the journal
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        objs = {}
+        if path.exists(file_path):
+            with open(file_path, 'rb') as f:
+                objs_json = codec.loads(f.read())
+                for obj_id, obj_json in objs_json.items():
+                    objs[obj_id] = cls(**obj_json)
+        replayed = self._replay(cls, file_path + ".journal.old", objs)
+        replayed += self._replay(cls, file_path + ".journal", objs)
+        with _lock(cls):
+            self._swap(cls, objs)
+            with JOURNAL_LOCK:
+                JOURNALS.setdefault(s_class, {'file': None, 'count': 0,
+                                              'compacting': False})
+                JOURNALS[s_class]['count'] = replayed
+
+    def _replay(self, cls: type, journal_path: str, objs: dict) -> int:
+        """ Apply the records of a journal file to objs, truncating a
+            torn last record so that the next append starts on a new line
+        Return: the number of records applied
+        """
+        if not path.exists(journal_path):
+            return 0
+        count = 0
+        offset = 0
+        with open(journal_path, 'r+b') as f:
+            for line in f:
+                try:
+                    record = codec.loads(line) if line.endswith(b"\n") \
+                        else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break
+                offset += len(line)
+                if record.get('op') == 'save':
+                    obj = cls(**record['obj'])
+                    objs[obj.id] = obj
+                elif record.get('op') == 'remove':
+                    objs.pop(record['id'], None)
+                count += 1
+            f.truncate(offset)
+        return count
+
+    def _reindex(self, cls: type) -> dict:
+        """ Rebuild the secondary indexes of the class from DATA
+        """
+        with _lock(cls):
+            return self._swap(cls, DATA.get(cls.__name__, {}))
+
+    def _swap(self, cls: type, objs: dict) -> dict:
+        """ Build the sorted IDs, indexes and columns of objs off to the
+            side, then swap them in with objs as the table of the class
+
+        The table is swapped in first and the indexes last, and search()
+        and page() read them in the reverse order, so a reader never
+        looks up new IDs in an old table.
+        """
+        s_class = cls.__name__
+        indexes = {attr: {} for attr in cls.indexes}
+        values = {}
+        columns = ColumnTable() if COLUMNAR else None
+        for obj in list(objs.values()):
+            _index_add(obj, indexes, values)
+            if columns is not None:
+                columns.upsert(obj.id, obj.attributes())
+        ordered = sorted(objs)
+        DATA[s_class] = objs
+        if columns is not None:
+            COLUMNS[s_class] = columns
+        INDEXED_VALUES[s_class] = values
+        ORDERED[s_class] = ordered
+        INDEXES[s_class] = indexes
+        return indexes
+
+    def _indexes(self, cls: type) -> dict:
+        """ Return the secondary indexes of the class
+        """
+        indexes = INDEXES.get(cls.__name__)
+        if indexes is None:
+            indexes = self._reindex(cls)
+        return indexes
+
+    def _ordered(self, cls: type) -> List[str]:
+        """ Return the sorted IDs of the class
+        """
+        ordered = ORDERED.get(cls.__name__)
+        if ordered is None:
+            self._reindex(cls)
+            ordered = ORDERED[cls.__name__]
+        return ordered
+
+    def _columns(self, cls: type) -> ColumnTable:
+        """ Return the column table of the class
+        """
+        columns = COLUMNS.get(cls.__name__)
+        if columns is None:
+            self._reindex(cls)
+            columns = COLUMNS[cls.__name__]
+        return columns
+
+    def _index_remove(self, obj: TypeVar('Base')):
+        """ Remove obj from the indexes of its class
+        """
+        s_class = obj.__class__.__name__
+        indexes = self._indexes(obj.__class__)
+        for attr, value in INDEXED_VALUES[s_class].pop(obj.id, {}).items():
+            bucket = indexes[attr].get(value, {})
+            bucket.pop(obj.id, None)
+            if not bucket:
+                indexes[attr].pop(value, None)
+
+    def _index_update(self, obj: TypeVar('Base')):
+        """ Move obj to the index buckets of its current values
+
+        obj joins its new buckets before leaving the old ones, and stays
+        put where a value is unchanged, so lock-free readers always find
+        it in one of them.
+        """
+        s_class = obj.__class__.__name__
+        indexes = self._indexes(obj.__class__)
+        old = INDEXED_VALUES[s_class].get(obj.id, {})
+        values = {}
+        for attr in obj.indexes:
+            value = getattr(obj, attr, None)
+            try:
+                if attr not in old or old[attr] != value:
+                    indexes[attr].setdefault(value, {})[obj.id] = None
+            except TypeError:
+                continue
+            values[attr] = value
+        INDEXED_VALUES[s_class][obj.id] = values
+        for attr, value in old.items():
+            if attr in values and values[attr] == value:
+                continue
+            bucket = indexes[attr].get(value, {})
+            bucket.pop(obj.id, None)
+            if not bucket:
+                indexes[attr].pop(value, None)
+
+    def _check_unique(self, obj: TypeVar('Base')):
+        """ Raise ValueError if a unique index already holds the value
+        """
+        indexes = self._indexes(obj.__class__)
+        for attr, unique in obj.indexes.items():
+            value = getattr(obj, attr, None)
+            if not unique or value is None:
+                continue
+            try:
+                ids = indexes[attr].get(value, {})
+            except TypeError:
+                continue
+            if any(obj_id != obj.id for obj_id in ids):
+                raise ValueError("{} {} already exists".format(attr, value))
+
+    def save_all(self, cls: type):
+        """ Save all objects to file
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        with SNAPSHOT_LOCK, JOURNAL_LOCK:
+            self._write_snapshot(cls, list(DATA[s_class].values()))
+            journal = JOURNALS.get(s_class)
+            if journal is not None and journal['file'] is not None:
+                journal['file'].close()
+                journal['file'] = None
+            for suffix in (".journal", ".journal.old"):
+                if path.exists(file_path + suffix):
+                    os.remove(file_path + suffix)
+
+    def _write_snapshot(self, cls: type, objs: List[TypeVar('Base')]):
+        """ Atomically replace the snapshot file with objs
+        """
+        file_path = ".db_{}.json".format(cls.__name__)
+        objs_json = {}
+        for obj in objs:
+            objs_json[obj.id] = obj.to_json(True)
+
+        with open(file_path + ".tmp", 'wb') as f:
+            f.write(codec.dumps(objs_json))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(file_path + ".tmp", file_path)
+
+    def _persist(self, cls: type, record: dict):
+        """ Persist one mutation record according to PERSISTENCE
+        """
+        if PERSISTENCE == "journal":
+            self._journal_append(cls, record)
+        elif PERSISTENCE == "group":
+            mark_dirty(cls)
+        else:
+            cls.save_to_file()
+
+    def _journal_append(self, cls: type, record: dict):
+        """ Append one mutation record to the journal, O(1)
+        Starts a background compaction every JOURNAL_COMPACT_EVERY records
+        """
+        s_class = cls.__name__
+        line = codec.dumps(record) + b"\n"
+        with JOURNAL_LOCK:
+            journal = JOURNALS.setdefault(s_class, {'file': None, 'count': 0,
+                                                    'compacting': False})
+            if journal['file'] is None:
+                file_path = ".db_{}.json.journal".format(s_class)
+                journal['file'] = open(file_path, 'ab')
+            journal['file'].write(line)
+            journal['file'].flush()
+            journal['count'] += 1
+            if journal['count'] < JOURNAL_COMPACT_EVERY or \
+               journal['compacting']:
+                return
+            journal['compacting'] = True
+        threading.Thread(target=self.compact, args=(cls,),
+                         daemon=True).start()
+
+    def compact(self, cls: type):
+        """ Fold the journal into the snapshot file
+
+        The journal is renamed to .journal.old before the snapshot is
+        written and only deleted once the new snapshot is in place, so a
+        crash at any point leaves files that load() replays to the latest
+        state (replaying a record twice is harmless).
+        """
+        s_class = cls.__name__
+        journal_path = ".db_{}.json.journal".format(s_class)
+        with SNAPSHOT_LOCK:
+            with JOURNAL_LOCK:
+                journal = JOURNALS.setdefault(s_class, {'file': None,
+                                                        'count': 0,
+                                                        'compacting': True})
+                if journal['file'] is not None:
+                    journal['file'].close()
+                    journal['file'] = None
+                if path.exists(journal_path + ".old") and \
+                   path.exists(journal_path):
+                    with open(journal_path, 'rb') as src, \
+                         open(journal_path + ".old", 'ab') as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(journal_path)
+                elif path.exists(journal_path):
+                    os.replace(journal_path, journal_path + ".old")
+                journal['count'] = 0
+                journal['compacting'] = False
+                objs = list(DATA[s_class].values())
+            self._write_snapshot(cls, objs)
+            if path.exists(journal_path + ".old"):
+                os.remove(journal_path + ".old")
+
+    def flush(self):
+        """ Write every pending "group" mutation
+        """
+        flush()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Store obj and persist the mutation
+        """
+        cls = obj.__class__
+        s_class = cls.__name__
+        with _lock(cls):
+            self._check_unique(obj)
+            table = DATA.setdefault(s_class, {})
+            if obj.id not in table:
+                insort(self._ordered(cls), obj.id)
+            table[obj.id] = obj
+            self._index_update(obj)
+            if COLUMNAR:
+                self._columns(cls).upsert(obj.id, obj.attributes())
+            self._persist(cls, {'op': 'save', 'obj': obj.to_json(True)})
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj and persist the mutation
+        """
+        cls = obj.__class__
+        with _lock(cls):
+            if DATA.get(cls.__name__, {}).pop(obj.id, None) is not None:
+                self._index_remove(obj)
+                ordered = self._ordered(cls)
+                del ordered[bisect_left(ordered, obj.id)]
+                if COLUMNAR:
+                    self._columns(cls).remove(obj.id)
+                self._persist(cls, {'op': 'remove', 'id': obj.id})
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        return len(DATA.get(cls.__name__, {}))
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        return DATA.get(cls.__name__, {}).get(id)
+
+    def page(self, cls: type, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to limit objects ordered by ID after the ID `after`,
+            by bisecting the sorted IDs
+        """
+        ordered = self._ordered(cls)
+        table = DATA.get(cls.__name__, {})
+        start = 0 if after is None else bisect_right(ordered, after)
+        end = None if limit is None else start + limit
+        return [obj for obj in map(table.get, ordered[start:end])
+                if obj is not None]
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects with matching attributes
+
+        An indexed attribute narrows the candidates, as of their last
+        save(); when they hold no match, all objects are scanned, so an
+        attribute set but not saved yet is still found. Otherwise, in
+        COLUMNAR mode, the columns are filtered in bulk and the matching
+        objects returned as of their last save().
+        """
+        def _search(obj):
+            if len(attributes) == 0:
+                return True
+            for k, v in attributes.items():
+                if (getattr(obj, k) != v):
+                    return False
+            return True
+
+        indexes = self._indexes(cls) if cls.indexes else {}
+        table = DATA.get(cls.__name__, {})
+        for k, v in attributes.items():
+            if k not in indexes:
+                continue
+            try:
+                ids = list(indexes[k].get(v, ()))
+            except TypeError:
+                continue
+            objs = [obj for obj in map(table.get, ids) if obj is not None]
+            found = list(filter(_search, objs))
+            if found:
+                return found
+            break
+        else:
+            if COLUMNAR and attributes:
+                with _lock(cls):
+                    ids = self._columns(cls).search(attributes)
+                if ids is not None:
+                    return [obj for obj in map(table.get, ids)
+                            if obj is not None]
+        return list(filter(_search, list(table.values())))
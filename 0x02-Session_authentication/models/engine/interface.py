@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Storage interface of models.base
+"""
+from abc import ABC, abstractmethod
+from typing import TypeVar, List
+
+
+class Storage(ABC):
+    """ Storage backend interface: every method takes the model class
+        (or an instance of it) it operates on
+    """
+
+    @abstractmethod
+    def load(self, cls: type):
+        """ Prepare the storage of cls (load its objects, create tables)
+        """
+
+    @abstractmethod
+    def save_all(self, cls: type):
+        """ Persist every object of cls
+        """
+
+    @abstractmethod
+    def save(self, obj: TypeVar('Base')):
+        """ Create or update obj
+        Raises ValueError if a unique index already holds one of its values
+        """
+
+    @abstractmethod
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+
+    @abstractmethod
+    def count(self, cls: type) -> int:
+        """ Count all objects of cls
+        """
+
+    @abstractmethod
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object of cls by ID, or None
+        """
+
+    @abstractmethod
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Return all objects of cls with matching attributes
+        """
+
+    def all(self, cls: type) -> List[TypeVar('Base')]:
+        """ Return all objects of cls
+        """
+        return self.search(cls)
+
+    def page(self, cls: type, after: str = None,
+             limit: int = None) -> List[TypeVar('Base')]:
+        """ Return up to limit objects of cls ordered by ID, starting
+            after the ID `after` (from the first one if None)
+        """
+        objs = sorted(self.all(cls), key=lambda obj: obj.id)
+        if after is not None:
+            objs = [obj for obj in objs if obj.id > after]
+        return objs if limit is None else objs[:limit]
+
+    def compact(self, cls: type):
+        """ Fold incremental persistence data of cls, if any
+        """
+
+    def flush(self):
+        """ Write pending mutations, if any
+        """
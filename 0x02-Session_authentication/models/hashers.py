@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+""" Password hashing schemes of models.user
+
+Hashes are encoded PHC style, $<scheme>$<param>=<value>,...$<salt>$<hash>
+with salt and hash in unpadded Base64, except the legacy unsalted SHA256
+hex digests, which are still verified. New hashes use PASSWORD_SCHEME
+with the cost parameters read from the environment.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from os import getenv
+from typing import Tuple
+
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+
+def b64encode(data: bytes) -> str:
+    """ Unpadded Base64 of data
+    """
+    return base64.b64encode(data).decode('ascii').rstrip("=")
+
+
+def b64decode(data: str) -> bytes:
+    """ Decode unpadded Base64
+    """
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+class Hasher(ABC):
+    """ A hashing scheme and the cost parameters of new hashes
+    """
+
+    name = None
+
+    def __init__(self, **params: int):
+        """ Set the cost parameters of new hashes
+        """
+        self.params = params
+
+    @abstractmethod
+    def digest(self, pwd: bytes, salt: bytes, params: dict) -> bytes:
+        """ Hash pwd with salt and params
+        """
+
+    def decode(self, encoded: str) -> Tuple[dict, bytes, bytes]:
+        """ Return the params, salt and hash of an encoded hash
+        """
+        _, name, params, salt, digest = encoded.split("$")
+        params = dict((k, int(v)) for k, v in
+                      (param.split("=") for param in params.split(",")))
+        return params, b64decode(salt), b64decode(digest)
+
+    def hash(self, pwd: str) -> str:
+        """ Hash pwd with a new salt and the current params
+        """
+        salt = os.urandom(SALT_SIZE)
+        digest = self.digest(pwd.encode(), salt, self.params)
+        return "${}${}${}${}".format(
+            self.name, ",".join("{}={}".format(k, v)
+                                for k, v in self.params.items()),
+            b64encode(salt), b64encode(digest))
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check pwd against encoded in constant time
+        """
+        params, salt, digest = self.decode(encoded)
+        return hmac.compare_digest(self.digest(pwd.encode(), salt, params),
+                                   digest)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ True if encoded was made with other params
+        """
+        return self.decode(encoded)[0] != self.params
+
+
+class SHA256Hasher(Hasher):
+    """ Legacy unsalted SHA256, hex encoded
+    """
+
+    name = "sha256"
+
+    def digest(self, pwd: bytes, salt: bytes, params: dict) -> bytes:
+        """ SHA256 of pwd, salt and params are ignored
+        """
+        return hashlib.sha256(pwd).digest()
+
+    def hash(self, pwd: str) -> str:
+        """ Hex SHA256 of pwd
+        """
+        return self.digest(pwd.encode(), b"", {}).hex()
+
+    def verify(self, pwd: str, encoded: str) -> bool:
+        """ Check pwd against encoded in constant time
+        """
+        return hmac.compare_digest(self.hash(pwd), encoded.lower())
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """ Nothing to tune
+        """
+        return False
+
+
+class PBKDF2Hasher(Hasher):
+    """ PBKDF2-HMAC-SHA256, cost parameter i (iterations)
+    """
+
+    name = "pbkdf2-sha256"
+
+    def digest(self, pwd: bytes, salt: bytes, params: dict) -> bytes:
+        """ Hash pwd with salt and params
+        """
+        return hashlib.pbkdf2_hmac('sha256', pwd, salt, params['i'],
+                                   HASH_SIZE)
+
+
+class ScryptHasher(Hasher):
+    """ scrypt, cost parameters ln (log2 of N), r and p
+    """
+
+    name = "scrypt"
+
+    def digest(self, pwd: bytes, salt: bytes, params: dict) -> bytes:
+        """ Hash pwd with salt and params
+        """
+        n, r, p = 1 << params['ln'], params['r'], params['p']
+        return hashlib.scrypt(pwd, salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2) + (1 << 20),
+                              dklen=HASH_SIZE)
+
+
+PASSWORD_SCHEME = getenv("PASSWORD_SCHEME", "scrypt")
+HASHERS = {hasher.name: hasher for hasher in (
+    SHA256Hasher(),
+    PBKDF2Hasher(i=int(getenv("PBKDF2_ITERATIONS", "600000"))),
+    ScryptHasher(ln=int(getenv("SCRYPT_LN", "14")),
+                 r=int(getenv("SCRYPT_R", "8")),
+                 p=int(getenv("SCRYPT_P", "1"))),
+)}
+if PASSWORD_SCHEME not in HASHERS:
+    raise ValueError("Unknown PASSWORD_SCHEME {}, expected one of {}".format(
+        PASSWORD_SCHEME, ", ".join(sorted(HASHERS))))
+
+
+def identify(encoded: str) -> Hasher:
+    """ Return the hasher of an encoded hash, or None
+    """
+    if not encoded.startswith("$"):
+        return HASHERS["sha256"]
+    return HASHERS.get(encoded.split("$", 2)[1])
+
+
+def hash_password(pwd: str) -> str:
+    """ Hash pwd with PASSWORD_SCHEME
+    """
+    return HASHERS[PASSWORD_SCHEME].hash(pwd)
+
+
+def verify_password(pwd: str, encoded: str) -> bool:
+    """ Check pwd against an encoded hash of any known scheme
+    """
+    hasher = identify(encoded)
+    if hasher is None:
+        return False
+    try:
+        return hasher.verify(pwd, encoded)
+    except (ValueError, KeyError, TypeError):
+        return False
+
+
+def needs_rehash(encoded: str) -> bool:
+    """ True if encoded isn't a PASSWORD_SCHEME hash with the current
+        cost parameters
+    """
+    hasher = identify(encoded)
+    if hasher is not HASHERS[PASSWORD_SCHEME]:
+        return True
+    try:
+        return hasher.needs_rehash(encoded)
+    except (ValueError, KeyError, TypeError):
+        return True
@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
 """Flask app
 """
-from auth import Auth
+from auth import Auth, HashingOverloaded, start_hashing_pool
 from flask import abort, Flask, jsonify, request, redirect
 
 AUTH = Auth()
+start_hashing_pool()
 app = Flask(__name__)
 
 
+@app.teardown_appcontext
+def end_request(exception) -> None:
+    """release the DB session of the request
+    """
+    AUTH.end_request()
+
+
+@app.errorhandler(HashingOverloaded)
+def overloaded(error) -> str:
+    """handler of a full password hashing queue
+    """
+    response = jsonify({"message": "service overloaded"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 @app.route("/", strict_slashes=False)
 def home():
     """route handler for "/"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Minimal asyncio HTTP/1.1 server for ASGI apps, used to run
+async_app.py where uvicorn isn't installed. Request bodies must have a
+Content-Length; the app must send its own Content-Length header.
+"""
+import asyncio
+import functools
+from http import HTTPStatus
+from urllib.parse import unquote
+
+MAX_HEAD_SIZE = 65536
+
+
+async def _serve_connection(app, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    """Function serving the requests of one keep-alive connection
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode('latin-1').split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = []
+                for line in lines[1:]:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers.append((name.strip().lower().encode(),
+                                        value.strip().encode('latin-1')))
+                fields = dict(headers)
+                length = int(fields.get(b"content-length", b"0"))
+                body = await reader.readexactly(length) if length else b""
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    ConnectionError, ValueError):
+                return
+            keep_alive = version == "HTTP/1.1" and \
+                fields.get(b"connection", b"").lower() != b"close"
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version[5:],
+                "method": method,
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode('latin-1'),
+                "query_string": query.encode('latin-1'),
+                "root_path": "",
+                "headers": headers,
+                "client": writer.get_extra_info("peername"),
+                "server": writer.get_extra_info("sockname"),
+            }
+            messages = [{"type": "http.request", "body": body,
+                         "more_body": False}]
+
+            async def receive() -> dict:
+                """Return the request body, then a disconnect
+                """
+                if messages:
+                    return messages.pop()
+                return {"type": "http.disconnect"}
+
+            async def send(message: dict) -> None:
+                """Write a response message to the connection
+                """
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    head = ["HTTP/1.1 {} {}".format(
+                        status, HTTPStatus(status).phrase)]
+                    for name, value in message.get("headers", []):
+                        head.append("{}: {}".format(name.decode('latin-1'),
+                                                    value.decode('latin-1')))
+                    head.append("Connection: {}".format(
+                        "keep-alive" if keep_alive else "close"))
+                    writer.write(("\r\n".join(head) + "\r\n\r\n")
+                                 .encode('latin-1'))
+                elif message["type"] == "http.response.body":
+                    writer.write(message.get("body", b""))
+                    if not message.get("more_body"):
+                        await writer.drain()
+
+            await app(scope, receive, send)
+            if not keep_alive:
+                return
+    finally:
+        writer.close()
+
+
+async def serve(app, host: str, port: int) -> None:
+    """Function serving app on host:port until cancelled
+    """
+    server = await asyncio.start_server(
+        functools.partial(_serve_connection, app), host, port,
+        limit=MAX_HEAD_SIZE)
+    async with server:
+        await server.serve_forever()
+
+
+def run(app, host: str = "127.0.0.1", port: int = 5000) -> None:
+    """Function running app, with the signature of uvicorn.run
+    """
+    asyncio.run(serve(app, host, int(port)))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""ASGI app: the endpoints of app.py on a single event loop, with
+hashing awaited from the process pool and queries from the DB thread
+"""
+import json
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from async_auth import AsyncAuth
+from auth import HashingOverloaded, start_hashing_pool
+
+AUTH = AsyncAuth()
+start_hashing_pool()
+ROUTES = {}
+
+
+class HTTPError(Exception):
+    """Raised by abort to answer with an HTTP error status
+    """
+
+    def __init__(self, status: int):
+        """Keep the status
+        """
+        self.status = status
+
+
+class Request:
+    """Method, path, form and cookies of an ASGI http request
+    """
+
+    def __init__(self, scope: dict, body: bytes):
+        """Parse the scope and body of the request
+        """
+        self.method = scope["method"]
+        self.path = scope["path"].rstrip("/") or "/"
+        headers = {name.decode('latin-1'): value.decode('latin-1')
+                   for name, value in scope["headers"]}
+        self.form = {}
+        if headers.get("content-type", "").startswith(
+                "application/x-www-form-urlencoded"):
+            self.form = dict(parse_qsl(body.decode('utf-8'),
+                                       keep_blank_values=True))
+        cookies = SimpleCookie(headers.get("cookie", ""))
+        self.cookies = {name: morsel.value
+                        for name, morsel in cookies.items()}
+
+
+def route(path: str, method: str = "GET"):
+    """Decorator registering a handler of method on path
+    """
+    def decorator(handler):
+        """Register the handler
+        """
+        ROUTES.setdefault(path, {})[method] = handler
+        return handler
+    return decorator
+
+
+def abort(status: int):
+    """Stop the handler with an HTTP error status
+    """
+    raise HTTPError(status)
+
+
+def response(status: int = 200, body: bytes = b"",
+             content_type: str = "text/plain", headers: list = None):
+    """Build a (status, headers, body) response
+    """
+    headers = list(headers or [])
+    headers.append(("content-type", content_type))
+    headers.append(("content-length", str(len(body))))
+    return status, headers, body
+
+
+def jsonify(data, status: int = 200, headers: list = None):
+    """Build a JSON response
+    """
+    return response(status, json.dumps(data).encode('utf-8'),
+                    "application/json", headers)
+
+
+def error(status: int):
+    """Build the response of an HTTP error status
+    """
+    phrase = HTTPStatus(status).phrase
+    return response(status, "{} {}".format(status, phrase).encode())
+
+
+@route("/")
+async def home(request: Request):
+    """route handler for "/"
+    """
+    return jsonify({"message": "Bienvenue"})
+
+
+@route("/users", "POST")
+async def users(request: Request):
+    """route handler for "/users"
+    """
+    email = request.form.get("email")
+    password = request.form.get("password")
+    if not (email and password):
+        abort(400)
+    try:
+        await AUTH.register_user(email, password)
+        return jsonify({"email": email, "message": "user created"})
+    except ValueError:
+        return jsonify({"message": "email already registered"}, 400)
+
+
+@route("/sessions", "POST")
+async def login(request: Request):
+    """route handler for POST "/sessions"
+    """
+    email = request.form.get("email")
+    password = request.form.get("password")
+    if not (email and password):
+        abort(400)
+
+    if not await AUTH.valid_login(email, password):
+        abort(401)
+
+    session_id = await AUTH.create_session(email)
+    cookie = "session_id={}; Path=/".format(session_id)
+    return jsonify({"email": email, "message": "logged in"},
+                   headers=[("set-cookie", cookie)])
+
+
+@route("/sessions", "DELETE")
+async def logout(request: Request):
+    """route handler for DELETE "/sessions"
+    """
+    session_id = request.cookies.get("session_id")
+    user = await AUTH.get_user_from_session_id(session_id)
+    if not (user and session_id):
+        abort(403)
+    await AUTH.destroy_session(user.id)
+    return response(302, headers=[("location", "/")])
+
+
+@route("/profile")
+async def profile(request: Request):
+    """route handler for GET "/profile"
+    """
+    session_id = request.cookies.get("session_id")
+    user = await AUTH.get_user_from_session_id(session_id)
+    if not (user and session_id):
+        abort(403)
+    return jsonify({"email": user.email})
+
+
+@route("/reset_password", "POST")
+async def get_reset_password_token(request: Request):
+    """route handler for POST "/reset_password"
+    """
+    email = request.form.get("email")
+    try:
+        token = await AUTH.get_reset_password_token(email)
+        return jsonify({"email": email, "reset_token": token})
+    except ValueError:
+        abort(403)
+
+
+@route("/reset_password", "PUT")
+async def update_password(request: Request):
+    """route handler for PUT "/reset_password"
+    """
+    email = request.form.get("email")
+    reset_token = request.form.get("reset_token")
+    new_password = request.form.get("new_password")
+
+    if not (email and reset_token and new_password):
+        abort(403)
+    try:
+        await AUTH.update_password(reset_token, new_password)
+        return jsonify({"email": email, "message": "Password updated"})
+    except ValueError:
+        abort(403)
+
+
+async def app(scope: dict, receive, send) -> None:
+    """ASGI entry point
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    try:
+        request = Request(scope, body)
+        handlers = ROUTES.get(request.path)
+        if handlers is None:
+            abort(404)
+        if request.method not in handlers:
+            abort(405)
+        status, headers, body = await handlers[request.method](request)
+    except HTTPError as e:
+        status, headers, body = error(e.status)
+    except UnicodeDecodeError:
+        status, headers, body = error(400)
+    except HashingOverloaded:
+        status, headers, body = jsonify({"message": "service overloaded"},
+                                        503, [("retry-after", "1")])
+    except Exception:
+        status, headers, body = error(500)
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(name.encode('latin-1'), value.encode('latin-1'))
+                            for name, value in headers]})
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    try:
+        from uvicorn import run
+    except ImportError:
+        from asgi_server import run
+    run(app, host="0.0.0.0", port=5000)
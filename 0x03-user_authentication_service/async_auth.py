@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Async Auth module
+"""
+
+import asyncio
+import bcrypt
+from async_db import AsyncDB
+from auth import _generate_uuid, _submit_hashing
+from user import User
+from sqlalchemy.orm.exc import NoResultFound
+
+
+async def _hash_password(password: str) -> bytes:
+    """Function to hash password in the hashing process pool
+
+    Args:
+        password (str): password string to hash
+
+    Return: Salted hash of the input password
+    """
+    salt = bcrypt.gensalt()
+    encoded_pwd = password.encode('utf-8')
+    return await asyncio.wrap_future(
+        _submit_hashing(bcrypt.hashpw, encoded_pwd, salt))
+
+
+async def _check_password(password: str, hashed_password: bytes) -> bool:
+    """Function to check a password against its hash in the hashing
+        process pool
+
+    Args:
+        password (str): password string to check
+        hashed_password (bytes): salted hash of the password
+
+    Return: True if they match
+    """
+    encoded_pwd = password.encode('utf-8')
+    return await asyncio.wrap_future(
+        _submit_hashing(bcrypt.checkpw, encoded_pwd, hashed_password))
+
+
+class AsyncAuth:
+    """Auth class with awaitable methods, for the asyncio app
+    """
+
+    def __init__(self):
+        self._db = AsyncDB()
+
+    async def register_user(self, email: str, password: str) -> User:
+        """Method to register a new user
+
+        Args:
+            email (str): email of user
+            password (str): password of user
+
+        Return: A User object
+
+        Raises:
+            ValueError: If a user already exist with the passed email
+        """
+        try:
+            await self._db.find_user_by(email=email)
+        except NoResultFound:
+            hash_pwd = await _hash_password(password)
+            return await self._db.add_user(email, hash_pwd)
+        raise ValueError(f"User {email} already exists")
+
+    async def valid_login(self, email: str, password: str) -> bool:
+        """Method that handles credentials validation
+
+        Args:
+            email (str): email of user
+            password (str): password of user
+
+        Return: boolean
+            True: If entered credentials are valid
+            False: If entered credentials are invalid
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            return False
+
+        return await _check_password(password, user.hashed_password)
+
+    async def create_session(self, email: str) -> str:
+        """Method that generates a new UUID
+           and store it in the database as the user’s session id
+
+        Args:
+            email (str): email of the user to generate a session id for
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            return
+
+        session_id = _generate_uuid()
+        await self._db.update_user(user.id, session_id=session_id)
+        return session_id
+
+    async def get_user_from_session_id(self, session_id: str) -> User:
+        """Method to find user by session ID
+
+        Args:
+            session_id (str): session ID to use in query
+
+        Return:
+             the corresponding User or None if not found
+        """
+        if session_id is None:
+            return
+        try:
+            return await self._db.find_user_by(session_id=session_id)
+        except NoResultFound:
+            return
+
+    async def destroy_session(self, user_id: int) -> None:
+        """Method to destroy a session by deleting the session ID
+
+        Args:
+            user_id (int): user ID for user to destroy session for
+        """
+        try:
+            await self._db.update_user(user_id, session_id=None)
+        except NoResultFound:
+            return
+
+    async def get_reset_password_token(self, email: str) -> str:
+        """Method to find user corresponding to the email and
+            generate a token to aid password reset
+
+        Args:
+            email (str): email of user to search for
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            raise ValueError
+
+        token = _generate_uuid()
+        await self._db.update_user(user.id, reset_token=token)
+        return token
+
+    async def update_password(self, reset_token: str, password: str) -> None:
+        """Method to find user corresponding to the reset token and
+           update the password
+
+        Args:
+            reset_token (str): token to authenticate reset
+            password (str): new password
+        """
+        try:
+            user = await self._db.find_user_by(reset_token=reset_token)
+        except NoResultFound:
+            raise ValueError
+
+        hash_pwd = await _hash_password(password)
+        await self._db.update_user(
+                user.id,
+                hashed_password=hash_pwd,
+                reset_token=None
+        )
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""Async DB module
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import inspect
+
+from db import DB
+from user import User
+
+
+class AsyncDB:
+    """Awaitable DB: every query runs on one dedicated thread, off the
+    event loop, since the DB session isn't thread-safe and SQLite has a
+    single writer anyway. Users are returned loaded and detached from the
+    session, so reading them never queries from the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new AsyncDB instance
+        """
+        self._db = DB()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="db")
+
+    async def _run(self, fn, *args, **kwargs):
+        """Method to await fn(*args, **kwargs) run on the DB thread
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs))
+
+    def _detached(self, fn, *args, **kwargs) -> User:
+        """Method to call fn on the DB thread and detach the User it
+            returns from the session
+        """
+        user = fn(*args, **kwargs)
+        session = self._db._session
+        if inspect(user).expired_attributes:
+            session.refresh(user)
+        session.expunge(user)
+        return user
+
+    async def add_user(self, email: str, hashed_password: str) -> User:
+        """Method to save the user to the database
+        """
+        return await self._run(self._detached, self._db.add_user,
+                               email, hashed_password)
+
+    async def find_user_by(self, **kwargs) -> User:
+        """Method that returns the first user matching kwargs
+
+        Raises:
+            InvalidRequestError: If any provided field is invalid.
+            NoResultFound: If no user matches.
+        """
+        return await self._run(self._detached, self._db.find_user_by,
+                               **kwargs)
+
+    async def update_user(self, user_id: int, **kwargs) -> None:
+        """Method that update the user’s attributes as passed in args
+
+        Raises:
+            ValueError: If any provided field is invalid.
+        """
+        await self._run(self._db.update_user, user_id, **kwargs)
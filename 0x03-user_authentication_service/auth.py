@@ -3,11 +3,86 @@
 """
 
 import bcrypt
+import multiprocessing
+import os
+import threading
 import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from os import getenv
 from user import User
 from db import DB
 from sqlalchemy.orm.exc import NoResultFound
 
+HASH_WORKERS = int(getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_DEPTH = int(getenv("HASH_QUEUE_DEPTH", str(4 * HASH_WORKERS)))
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_DEPTH)
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+
+class HashingOverloaded(Exception):
+    """Raised when HASH_QUEUE_DEPTH bcrypt calls are already waiting
+    """
+
+
+def start_hashing_pool() -> None:
+    """Function to start the hashing process pool and fork all of its
+    workers right away
+
+    Call it at startup, while the process is still single-threaded: a
+    worker forked from a request thread could inherit a lock held by
+    another thread. Fork (rather than forkserver or spawn) is used
+    because those re-import the main module in each worker, and
+    importing app.py creates a DB, which drops the tables.
+    """
+    global _hash_executor
+    with _hash_executor_lock:
+        if HASH_WORKERS <= 0 or _hash_executor is not None:
+            return
+        mp_context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        _hash_executor = ProcessPoolExecutor(HASH_WORKERS,
+                                             mp_context=mp_context)
+        # with fork, the first submit launches every worker
+        _hash_executor.submit(int).result()
+
+
+def _submit_hashing(fn, *args) -> Future:
+    """Function to submit a bcrypt call to the hashing process pool
+
+    Runs it inline if HASH_WORKERS is 0. The pool is started on first
+    use if start_hashing_pool() wasn't called.
+
+    Return: a Future of the result
+
+    Raises:
+        HashingOverloaded: If the pool and its queue are full
+    """
+    if HASH_WORKERS <= 0:
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingOverloaded
+    try:
+        start_hashing_pool()
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+
+def _run_hashing(fn, *args):
+    """Function to run a bcrypt call in the hashing process pool
+
+    Raises:
+        HashingOverloaded: If the pool and its queue are full
+    """
+    return _submit_hashing(fn, *args).result()
+
 
 def _hash_password(password: str) -> bytes:
     """Function to hash password
@@ -19,7 +94,20 @@ def _hash_password(password: str) -> bytes:
     """
     salt = bcrypt.gensalt()
     encoded_pwd = password.encode('utf-8')
-    return bcrypt.hashpw(encoded_pwd, salt)
+    return _run_hashing(bcrypt.hashpw, encoded_pwd, salt)
+
+
+def _check_password(password: str, hashed_password: bytes) -> bool:
+    """Function to check a password against its hash
+
+    Args:
+        password (str): password string to check
+        hashed_password (bytes): salted hash of the password
+
+    Return: True if they match
+    """
+    encoded_pwd = password.encode('utf-8')
+    return _run_hashing(bcrypt.checkpw, encoded_pwd, hashed_password)
 
 
 def _generate_uuid() -> str:
@@ -34,6 +122,11 @@ class Auth:
     def __init__(self):
         self._db = DB()
 
+    def end_request(self) -> None:
+        """Method to release the DB session of the current request
+        """
+        self._db.remove_session()
+
     def register_user(self, email: str, password: str) -> User:
         """Method to register a new user
 
@@ -71,7 +164,7 @@ class Auth:
         except NoResultFound:
             return False
 
-        return bcrypt.checkpw(password.encode('utf-8'), user.hashed_password)
+        return _check_password(password, user.hashed_password)
 
     def create_session(self, email: str) -> str:
         """Method that generates a new UUID
@@ -85,8 +178,9 @@ class Auth:
         except NoResultFound:
             return
 
-        user.session_id = _generate_uuid()
-        return user.session_id
+        session_id = _generate_uuid()
+        self._db.update_user(user.id, session_id=session_id)
+        return session_id
 
     def get_user_from_session_id(self, session_id: str) -> User:
         """Method to find user by session ID
@@ -117,7 +211,7 @@ class Auth:
             return
 
         if user:
-            user.session_id = None
+            self._db.update_user(user.id, session_id=None)
 
     def get_reset_password_token(self, email: str) -> str:
         """Method to find user corresponding to the email and
@@ -132,8 +226,7 @@ class Auth:
             raise ValueError
 
         token = _generate_uuid()
-        user.reset_token = token
-        self._db._session.commit()
+        self._db.update_user(user.id, reset_token=token)
         return token
 
     def update_password(self, reset_token: str, password: str) -> None:
@@ -2,37 +2,95 @@
 
 """DB module
 """
-from sqlalchemy import create_engine
+from os import getenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import InvalidRequestError
 
 from user import Base, User
 
+DB_URL = getenv("DB_URL", "sqlite:///a.db")
+DB_POOL_SIZE = int(getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(getenv("DB_POOL_TIMEOUT", "30"))
+DB_SCOPED_SESSION = getenv("DB_SCOPED_SESSION", "1") not in ("", "0")
+DB_KEEP_DATA = getenv("DB_KEEP_DATA", "") not in ("", "0")
+
+
+def _tune_sqlite(dbapi_connection, connection_record) -> None:
+    """Function to set WAL mode on every new SQLite connection, so
+        readers don't block the writer
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 
 class DB:
     """DB class
+
+    In scoped session mode (DB_SCOPED_SESSION, on by default) every
+    thread gets its own session, taking a connection from the engine
+    pool, until remove_session() gives it back; otherwise one session is
+    shared by the whole process.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, keep_data: bool = DB_KEEP_DATA) -> None:
         """Initialize a new DB instance
+
+        Args:
+            keep_data (bool): keep the existing tables and rows instead
+                of recreating the tables
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+        url = make_url(DB_URL)
+        pool = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT}
+        if url.get_backend_name() == "sqlite":
+            if url.database in (None, "", ":memory:"):
+                # an in-memory database lives in its connection: keep the
+                # default per-thread pool
+                pool = {}
+            self._engine = create_engine(
+                url, echo=False,
+                connect_args={"check_same_thread": False}, **pool)
+            event.listen(self._engine, "connect", _tune_sqlite)
+        else:
+            self._engine = create_engine(url, echo=False,
+                                         pool_pre_ping=True, **pool)
+        if not keep_data:
+            Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
         self.__session = None
+        self.__scoped_session = None
+        if DB_SCOPED_SESSION:
+            self.__scoped_session = scoped_session(
+                sessionmaker(bind=self._engine))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session of the current thread in scoped session mode,
+            memoized session object otherwise
         """
+        if self.__scoped_session is not None:
+            return self.__scoped_session()
         if self.__session is None:
             DBSession = sessionmaker(bind=self._engine)
             self.__session = DBSession()
         return self.__session
 
+    def remove_session(self) -> None:
+        """Method to close the session of the current thread and give
+            its connection back to the pool, in scoped session mode
+        """
+        if self.__scoped_session is not None:
+            self.__scoped_session.remove()
+
     def add_user(self, email: str, hashed_password: str) -> User:
         """Method to save the user to the database
         """